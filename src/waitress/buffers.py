@@ -15,6 +15,8 @@
 """
 from io import BytesIO
 
+from waitress.compat import buffered_file_types, raw_file_types
+
 # copy_bytes controls the size of temp. strings for shuffling data around.
 COPY_BYTES = 1 << 18  # 256K
 
@@ -138,15 +140,32 @@ def _is_seekable(fp):
     return hasattr(fp, "seek") and hasattr(fp, "tell")
 
 
+def _get_fileno(fp):
+    # only plain OS files are sent with os.sendfile; calling fileno() on
+    # anything else may have side effects (SpooledTemporaryFile rolls over
+    # to disk) or return a descriptor that isn't the stream we serve
+    raw = fp.raw if isinstance(fp, buffered_file_types) else fp
+    if not isinstance(raw, raw_file_types):
+        return None
+    try:
+        return raw.fileno()
+    except (ValueError, EnvironmentError):
+        # closed or detached
+        return None
+
+
 class ReadOnlyFileBasedBuffer(FileBasedBuffer):
     # used as wsgi.file_wrapper
 
+    sendfile_fd = None  # file descriptor usable with os.sendfile, if any
+
     def __init__(self, file, block_size=32768):
         self.file = file
         self.block_size = block_size  # for __iter__
 
     def prepare(self, size=None):
         if _is_seekable(self.file):
+            self.sendfile_fd = _get_fileno(self.file)
             start_pos = self.file.tell()
             self.file.seek(0, 2)
             end_pos = self.file.tell()
@@ -199,11 +218,12 @@ class OverflowableBuffer(object):
 
     overflowed = False
     buf = None
-    strbuf = b""  # Bytes-based buffer.
 
     def __init__(self, overflow):
         # overflow is the maximum to be stored in a StringIO buffer.
         self.overflow = overflow
+        # Bytes-based buffer, grown in place to avoid copying on each append.
+        self.strbuf = bytearray()
 
     def __len__(self):
         buf = self.buf
@@ -230,7 +250,7 @@ class OverflowableBuffer(object):
         buf = self.buf
         if strbuf:
             buf.append(self.strbuf)
-            self.strbuf = b""
+            self.strbuf = bytearray()
         return buf
 
     def _set_small_buffer(self):
@@ -246,7 +266,8 @@ class OverflowableBuffer(object):
         if buf is None:
             strbuf = self.strbuf
             if len(strbuf) + len(s) < STRBUF_LIMIT:
-                self.strbuf = strbuf + s
+                strbuf += s
+                self.strbuf = strbuf
                 return
             buf = self._create_buffer()
         buf.append(s)
@@ -262,7 +283,8 @@ class OverflowableBuffer(object):
         if buf is None:
             strbuf = self.strbuf
             if not skip:
-                return strbuf
+                # return a copy; strbuf may grow while the caller holds it
+                return bytes(strbuf)
             buf = self._create_buffer()
         return buf.get(numbytes, skip)
 
@@ -273,7 +295,7 @@ class OverflowableBuffer(object):
                 # We could slice instead of converting to
                 # a buffer, but that would eat up memory in
                 # large transfers.
-                self.strbuf = b""
+                self.strbuf = bytearray()
                 return
             buf = self._create_buffer()
         buf.skip(numbytes, allow_prune)
@@ -285,7 +307,7 @@ class OverflowableBuffer(object):
         """
         buf = self.buf
         if buf is None:
-            self.strbuf = b""
+            self.strbuf = bytearray()
             return
         buf.prune()
         if self.overflowed:
@@ -306,3 +328,13 @@ class OverflowableBuffer(object):
         buf = self.buf
         if buf is not None:
             buf.close()
+
+    def reset(self):
+        """
+        Closes any underlying buffer and discards all data so that this
+        buffer can be reused.
+        """
+        self.close()
+        self.buf = None
+        self.strbuf = bytearray()
+        self.overflowed = False
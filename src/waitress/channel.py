@@ -11,6 +11,9 @@
 # FOR A PARTICULAR PURPOSE.
 #
 ##############################################################################
+from collections import deque
+import errno
+import os
 import socket
 import threading
 import time
@@ -21,6 +24,7 @@ from waitress.buffers import (
     ReadOnlyFileBasedBuffer,
 )
 
+from waitress.compat import bytes_view
 from waitress.parser import HTTPRequestParser
 
 from waitress.task import (
@@ -32,6 +36,32 @@ from waitress.utilities import InternalServerError
 
 from . import wasyncore
 
+# sent ahead of the body to clients that sent "Expect: 100-continue"
+CONTINUE_RESPONSE = b"HTTP/1.1 100 Continue\r\n\r\n"
+CONTINUE_RESPONSE_LEN = len(CONTINUE_RESPONSE)
+
+# passed to send() when more data follows so that Linux coalesces segments
+MSG_MORE = getattr(socket, "MSG_MORE", 0)
+
+# errors from sendfile() meaning the file must be sent the usual way instead
+SENDFILE_UNSUPPORTED = frozenset(
+    getattr(errno, name)
+    for name in ("EINVAL", "ENOSYS", "ENOTSUP", "EOPNOTSUPP", "ENOTSOCK")
+    if hasattr(errno, name)
+)
+
+# the largest number of bytes read from the outbufs for a single send, and
+# the granularity it is rounded down to
+MAX_SENDBUF_LEN = 1 << 16  # 64K
+SENDBUF_ALIGN = 4096
+
+# the maximum number of outbufs combined into a single send
+MAX_IOVECS = 16
+
+# the number of times a task thread yields to the mainloop while waiting for
+# the outbufs to drain below the high watermark before blocking
+WATERMARK_SPIN_COUNT = 15
+
 
 class ClientDisconnected(Exception):
     """ Raised when attempting to write to a closed socket."""
@@ -50,13 +80,14 @@ class HTTPChannel(wasyncore.dispatcher, object):
     parser_class = HTTPRequestParser
 
     request = None  # A request parser instance
-    last_activity = 0  # Time of last activity
+    last_activity = 0  # Time of last activity (mainloop monotonic time)
     will_close = False  # set to True to close the socket.
     close_when_flushed = False  # set to True to close the socket when flushed
     requests = ()  # currently pending requests
     sent_continue = False  # used as a latch after sending 100 continue
     total_outbufs_len = 0  # total bytes ready to send
     current_outbuf_count = 0  # total bytes written to current outbuf
+    outbuf_lock_held = False  # True while the mainloop holds outbuf_lock
 
     #
     # ASYNCHRONOUS METHODS (including __init__)
@@ -67,14 +98,30 @@ class HTTPChannel(wasyncore.dispatcher, object):
     ):
         self.server = server
         self.adj = adj
-        self.outbufs = [OverflowableBuffer(adj.outbuf_overflow)]
-        self.creation_time = self.last_activity = time.time()
-        self.sendbuf_len = sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF)
+        # cache the adjustments consulted on every I/O event
+        self.send_bytes = adj.send_bytes
+        self.recv_bytes = adj.recv_bytes
+        self.outbuf_overflow = adj.outbuf_overflow
+        self.outbuf_high_watermark = adj.outbuf_high_watermark
+        self.log_socket_errors = adj.log_socket_errors
+        self.outbufs = deque([server.get_buf()])
+        self.creation_time = self.last_activity = server.now
+        sendbuf_len = sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF)
+        if sendbuf_len > SENDBUF_ALIGN:
+            # read from the outbufs in page-aligned chunks of a bounded size
+            # rather than whatever odd size the kernel reports (e.g. 212992)
+            sendbuf_len = min(sendbuf_len, MAX_SENDBUF_LEN) & ~(SENDBUF_ALIGN - 1)
+        self.sendbuf_len = sendbuf_len
+        # sendmsg() lets us send data from several outbufs in one syscall
+        self.vectored_send = hasattr(sock, "sendmsg")
+        # sendfile() lets the kernel send wsgi.file_wrapper files directly
+        self.use_sendfile = hasattr(os, "sendfile")
 
         # task_lock used to push/pop requests
         self.task_lock = threading.Lock()
-        # outbuf_lock used to access any outbuf (expected to use an RLock)
-        self.outbuf_lock = threading.Condition()
+        # outbuf_lock used to access any outbuf; it is not reentrant, see
+        # outbuf_lock_held for the one place where that matters
+        self.outbuf_lock = threading.Condition(threading.Lock())
 
         wasyncore.dispatcher.__init__(self, sock, map=map)
 
@@ -102,11 +149,11 @@ class HTTPChannel(wasyncore.dispatcher, object):
             #    because it's either data left over from task output
             #    or a 100 Continue line sent within "received".
             flush = self._flush_some
-        elif self.total_outbufs_len >= self.adj.send_bytes:
+        elif self.total_outbufs_len >= self.send_bytes:
             # 1. There's a running task, so we need to try to lock
             #    the outbuf before sending
             # 2. Only try to send if the data in the out buffer is larger
-            #    than self.adj_bytes to avoid TCP fragmentation
+            #    than self.send_bytes to avoid TCP fragmentation
             flush = self._flush_some_if_lockable
         else:
             # 1. There's not enough data in the out buffer to bother to send
@@ -117,7 +164,7 @@ class HTTPChannel(wasyncore.dispatcher, object):
             try:
                 flush()
             except socket.error:
-                if self.adj.log_socket_errors:
+                if self.log_socket_errors:
                     self.logger.exception("Socket error")
                 self.will_close = True
             except Exception:
@@ -141,14 +188,14 @@ class HTTPChannel(wasyncore.dispatcher, object):
 
     def handle_read(self):
         try:
-            data = self.recv(self.adj.recv_bytes)
+            data = self.recv(self.recv_bytes)
         except socket.error:
-            if self.adj.log_socket_errors:
+            if self.log_socket_errors:
                 self.logger.exception("Socket error")
             self.handle_close()
             return
         if data:
-            self.last_activity = time.time()
+            self.last_activity = self.server.now
             self.received(data)
 
     def received(self, data):
@@ -163,21 +210,34 @@ class HTTPChannel(wasyncore.dispatcher, object):
         if not data:
             return False
 
-        while data:
-            if request is None:
-                request = self.parser_class(self.adj)
-            n = request.received(data)
+        if request is None:
+            request = self.parser_class(self.adj)
+        n = request.received(data)
+
+        if n >= len(data) and request.completed and not request.expect_continue:
+            # common case: exactly one whole request arrived in a single read
+            self.request = None
+            if not request.empty:
+                self.requests = [request]
+                self.server.add_task(self)
+            return True
+
+        # hand the parser views over data rather than copying the tail of it
+        # each time a request is split off
+        view = bytes_view(data)
+        datalen = len(data)
+        offset = 0
+
+        while True:
             if request.expect_continue and request.headers_finished:
                 # guaranteed by parser to be a 1.1 request
                 request.expect_continue = False
                 if not self.sent_continue:
                     # there's no current task, so we don't need to try to
                     # lock the outbuf to append to it.
-                    outbuf_payload = b"HTTP/1.1 100 Continue\r\n\r\n"
-                    num_bytes = len(outbuf_payload)
-                    self.outbufs[-1].append(outbuf_payload)
-                    self.current_outbuf_count += num_bytes
-                    self.total_outbufs_len += num_bytes
+                    self.outbufs[-1].append(CONTINUE_RESPONSE)
+                    self.current_outbuf_count += CONTINUE_RESPONSE_LEN
+                    self.total_outbufs_len += CONTINUE_RESPONSE_LEN
                     self.sent_continue = True
                     self._flush_some()
                     request.completed = False
@@ -189,9 +249,12 @@ class HTTPChannel(wasyncore.dispatcher, object):
                 request = None
             else:
                 self.request = request
-            if n >= len(data):
+            offset += n
+            if offset >= datalen:
                 break
-            data = data[n:]
+            if request is None:
+                request = self.parser_class(self.adj)
+            n = request.received(view[offset:])
 
         if requests:
             self.requests = requests
@@ -203,72 +266,180 @@ class HTTPChannel(wasyncore.dispatcher, object):
         # Since our task may be appending to the outbuf, we try to acquire
         # the lock, but we don't block if we can't.
         if self.outbuf_lock.acquire(False):
+            self.outbuf_lock_held = True
             try:
                 self._flush_some()
 
-                if self.total_outbufs_len < self.adj.outbuf_high_watermark:
+                if self.total_outbufs_len < self.outbuf_high_watermark:
                     self.outbuf_lock.notify()
             finally:
+                self.outbuf_lock_held = False
                 self.outbuf_lock.release()
 
     def _flush_some(self):
         # Send as much data as possible to our client
 
         sent = 0
-        dobreak = False
+        outbufs = self.outbufs
+        # bind what the loop uses on every pass; the head outbuf only
+        # changes when we pop it below
+        popleft = outbufs.popleft
+        send = self.send
+        send_flags = self._send_flags
+        sendbuf_len = self.sendbuf_len
+        outbuf = outbufs[0]
 
         while True:
-            outbuf = self.outbufs[0]
             # use outbuf.__len__ rather than len(outbuf) FBO of not getting
             # OverflowError on 32-bit Python
-            outbuflen = outbuf.__len__()
-            while outbuflen > 0:
-                chunk = outbuf.get(self.sendbuf_len)
-                num_sent = self.send(chunk)
-                if num_sent:
-                    outbuf.skip(num_sent, True)
-                    outbuflen -= num_sent
-                    sent += num_sent
-                    self.total_outbufs_len -= num_sent
-                else:
-                    # failed to write anything, break out entirely
-                    dobreak = True
-                    break
-            else:
+            if outbuf.__len__() <= 0:
                 # self.outbufs[-1] must always be a writable outbuf
-                if len(self.outbufs) > 1:
-                    toclose = self.outbufs.pop(0)
+                if len(outbufs) > 1:
+                    toclose = popleft()
+                    outbuf = outbufs[0]
                     try:
-                        toclose.close()
+                        self._release_outbuf(toclose)
                     except Exception:
                         self.logger.exception("Unexpected error when closing an outbuf")
-                else:
-                    # caught up, done flushing for now
-                    dobreak = True
+                    continue
+                # caught up, done flushing for now
+                break
 
-            if dobreak:
+            if self._can_sendfile(outbuf):
+                num_sent = self._sendfile(outbuf)
+                if num_sent is None:
+                    # fall back to reading the file ourselves
+                    continue
+            elif len(outbufs) > 1:
+                num_sent = self._send_gathered()
+            else:
+                chunk = outbuf.get(sendbuf_len)
+                num_sent = send(chunk, send_flags(len(chunk)))
+                if num_sent:
+                    outbuf.skip(num_sent, True)
+
+            if not num_sent:
+                # failed to write anything, break out entirely
                 break
+            sent += num_sent
+            self.total_outbufs_len -= num_sent
 
         if sent:
-            self.last_activity = time.time()
+            self.last_activity = self.server.now
             return True
 
         return False
 
+    def _send_gathered(self):
+        # Gather up to sendbuf_len bytes from the leading outbufs without
+        # consuming them and hand them to the kernel in a single syscall,
+        # then skip whatever was actually sent in each outbuf.
+        pending = []
+        chunks = []
+        remaining = self.sendbuf_len
+        for outbuf in self.outbufs:
+            if remaining <= 0 or len(chunks) >= MAX_IOVECS:
+                break
+            if chunks and self._can_sendfile(outbuf):
+                # send what we have; sendfile() takes over from here
+                break
+            # OverflowableBuffer.get returns all of its data while it is
+            # still held in a string, so clamp to keep within sendbuf_len
+            chunk = outbuf.get(remaining)[:remaining]
+            if chunk:
+                pending.append(outbuf)
+                chunks.append(chunk)
+                remaining -= len(chunk)
+
+        flags = self._send_flags(self.sendbuf_len - remaining)
+        if len(chunks) == 1:
+            num_sent = self.send(chunks[0], flags)
+        elif self.vectored_send:
+            num_sent = self.sendmsg(chunks, flags)
+        else:
+            # no scatter-gather I/O available, so coalesce the chunks into
+            # one string rather than calling send() once per outbuf
+            num_sent = self.send(b"".join(chunks), flags)
+
+        left = num_sent
+        for outbuf, chunk in zip(pending, chunks):
+            if left <= 0:
+                break
+            num_bytes = min(left, len(chunk))
+            outbuf.skip(num_bytes, True)
+            left -= num_bytes
+
+        return num_sent
+
+    def _can_sendfile(self, outbuf):
+        return (
+            outbuf.__class__ is ReadOnlyFileBasedBuffer
+            and outbuf.sendfile_fd is not None
+            and self.use_sendfile
+        )
+
+    def _sendfile(self, outbuf):
+        # Have the kernel copy data from the file wrapped by a
+        # wsgi.file_wrapper straight to the socket. sendfile() does not move
+        # the file position, so skip over what was sent as usual. Returns
+        # None if sendfile() can't be used with this file.
+        try:
+            num_sent = self.sendfile(
+                outbuf.sendfile_fd, outbuf.file.tell(), outbuf.remain
+            )
+        except EnvironmentError as why:
+            if why.args[0] not in SENDFILE_UNSUPPORTED:
+                raise
+            outbuf.sendfile_fd = None
+            return None
+        if num_sent:
+            outbuf.skip(num_sent, True)
+        return num_sent
+
+    def _send_flags(self, num_bytes):
+        # If the outbufs hold more than we are about to send, _flush_some will
+        # send again right away, so ask the kernel to hold back a partially
+        # filled segment until then instead of pushing it out on its own. The
+        # final send of a flush is made without MSG_MORE, which flushes it.
+        if self.total_outbufs_len > num_bytes:
+            return MSG_MORE
+        return 0
+
+    def _release_outbuf(self, outbuf):
+        # our own buffers go back to the server for reuse; anything else,
+        # such as a wsgi.file_wrapper, is closed
+        if outbuf.__class__ is OverflowableBuffer:
+            self.server.put_buf(outbuf)
+        else:
+            outbuf.close()
+
     def handle_close(self):
-        with self.outbuf_lock:
-            for outbuf in self.outbufs:
-                try:
-                    outbuf.close()
-                except Exception:
-                    self.logger.exception(
-                        "Unknown exception while trying to close outbuf"
-                    )
-            self.total_outbufs_len = 0
-            self.connected = False
-            self.outbuf_lock.notify()
+        if self.outbuf_lock_held:
+            # send() noticed a disconnect while _flush_some_if_lockable
+            # holds outbuf_lock, so we must not acquire it again
+            outbufs = self._detach_outbufs()
+        else:
+            with self.outbuf_lock:
+                outbufs = self._detach_outbufs()
+        # closing the buffers may mean a file close per buffer, so do it
+        # without keeping write_soon waiters blocked on outbuf_lock
+        for outbuf in outbufs:
+            try:
+                self._release_outbuf(outbuf)
+            except Exception:
+                self.logger.exception("Unknown exception while trying to close outbuf")
         wasyncore.dispatcher.close(self)
 
+    def _detach_outbufs(self):
+        # Precondition: outbuf_lock is held
+        outbufs = self.outbufs
+        # the released buffers may be handed out to other channels
+        self.outbufs = deque()
+        self.total_outbufs_len = 0
+        self.connected = False
+        self.outbuf_lock.notify()
+        return outbufs
+
     def add_channel(self, map=None):
         """See wasyncore.dispatcher
 
@@ -299,42 +470,57 @@ class HTTPChannel(wasyncore.dispatcher, object):
             raise ClientDisconnected
         if data:
             # the async mainloop might be popping data off outbuf; we can
-            # block here waiting for it because we're in a task thread
+            # block here waiting for it because we're in a task thread. This
+            # is done before taking the lock to append: the task thread is the
+            # only writer, so nothing can push us back over the watermark.
+            self._flush_outbufs_below_high_watermark()
             with self.outbuf_lock:
-                self._flush_outbufs_below_high_watermark()
                 if not self.connected:
                     raise ClientDisconnected
                 num_bytes = len(data)
                 if data.__class__ is ReadOnlyFileBasedBuffer:
                     # they used wsgi.file_wrapper
                     self.outbufs.append(data)
-                    nextbuf = OverflowableBuffer(self.adj.outbuf_overflow)
+                    nextbuf = self.server.get_buf()
                     self.outbufs.append(nextbuf)
                     self.current_outbuf_count = 0
                 else:
-                    if self.current_outbuf_count >= self.adj.outbuf_high_watermark:
+                    if self.current_outbuf_count >= self.outbuf_high_watermark:
                         # rotate to a new buffer if the current buffer has hit
                         # the watermark to avoid it growing unbounded
-                        nextbuf = OverflowableBuffer(self.adj.outbuf_overflow)
+                        nextbuf = self.server.get_buf()
                         self.outbufs.append(nextbuf)
                         self.current_outbuf_count = 0
                     self.outbufs[-1].append(data)
                     self.current_outbuf_count += num_bytes
                 self.total_outbufs_len += num_bytes
-                if self.total_outbufs_len >= self.adj.send_bytes:
-                    self.server.pull_trigger()
+                pull_trigger = self.total_outbufs_len >= self.send_bytes
+            # wake up the mainloop after releasing the lock so that it is able
+            # to acquire it and flush right away
+            if pull_trigger:
+                self.server.pull_trigger()
             return num_bytes
         return 0
 
     def _flush_outbufs_below_high_watermark(self):
         # check first to avoid locking if possible
-        if self.total_outbufs_len > self.adj.outbuf_high_watermark:
+        if self.total_outbufs_len > self.outbuf_high_watermark:
+            # wake the mainloop up to flush; it usually drains the outbufs
+            # quickly, so yield to it a few times before parking on the
+            # condition, which is notified once it is below the watermark
+            self.server.pull_trigger()
+            for _ in range(WATERMARK_SPIN_COUNT):
+                if (
+                    not self.connected
+                    or self.total_outbufs_len <= self.outbuf_high_watermark
+                ):
+                    return
+                time.sleep(0)
             with self.outbuf_lock:
                 while (
                     self.connected
-                    and self.total_outbufs_len > self.adj.outbuf_high_watermark
+                    and self.total_outbufs_len > self.outbuf_high_watermark
                 ):
-                    self.server.pull_trigger()
                     self.outbuf_lock.wait()
 
     def service(self):
@@ -407,18 +593,18 @@ class HTTPChannel(wasyncore.dispatcher, object):
                     # not be deallocated regularly when a connection is open
                     # for a long time
                     if self.current_outbuf_count > 0:
-                        self.current_outbuf_count = self.adj.outbuf_high_watermark
+                        self.current_outbuf_count = self.outbuf_high_watermark
 
                     request = self.requests.pop(0)
                     request.close()
 
         if self.connected:
             self.server.pull_trigger()
-        self.last_activity = time.time()
+        self.last_activity = self.server.now
 
     def cancel(self):
         """ Cancels all pending / active requests """
         self.will_close = True
         self.connected = False
-        self.last_activity = time.time()
+        self.last_activity = self.server.now
         self.requests = []
@@ -1,3 +1,4 @@
+import io
 import os
 import sys
 import types
@@ -76,6 +77,16 @@ else:
         return s
 
 
+if PY3:  # pragma: no cover
+    # a zero-copy view over received bytes that the parser can consume
+    bytes_view = memoryview
+else:
+
+    def bytes_view(data):
+        # str + memoryview concatenation is unsupported on Python 2
+        return data
+
+
 if PY3:  # pragma: no cover
     import builtins
 
@@ -172,8 +183,22 @@ def qualname(cls):
     return cls.__name__
 
 
+try:
+    from time import monotonic
+except ImportError:  # pragma: no cover
+    # py2
+    from time import time as monotonic
+
 try:
     import thread
 except ImportError:
     # py3
     import _thread as thread
+
+# file objects whose fileno() is the byte stream they read from; wrappers
+# such as GzipFile also have a fileno(), but it refers to the file on disk
+if PY3:  # pragma: no cover
+    raw_file_types = (io.FileIO,)
+else:
+    raw_file_types = (io.FileIO, file)
+buffered_file_types = (io.BufferedReader, io.BufferedRandom)
@@ -88,7 +88,12 @@ class HTTPRequestParser(object):
             # In header.
             max_header = self.adj.max_request_header_size
 
-            s = self.header_plus + data
+            if self.header_plus:
+                s = self.header_plus + data
+            else:
+                # data may be a view over a larger buffer holding several
+                # pipelined requests; only copy out the part we keep below
+                s = data
             index = find_double_newline(s)
             consumed = 0
 
@@ -115,7 +120,7 @@ class HTTPRequestParser(object):
 
             if index >= 0:
                 # Header finished.
-                header_plus = s[:index]
+                header_plus = bytes(s[:index])
 
                 # Remove preceeding blank lines. This is suggested by
                 # https://tools.ietf.org/html/rfc7230#section-3.5 to support
@@ -156,7 +161,7 @@ class HTTPRequestParser(object):
                 return consumed
 
             # Header not finished yet.
-            self.header_plus = s
+            self.header_plus = bytes(s)
 
             return datalen
         else:
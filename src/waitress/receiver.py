@@ -84,6 +84,9 @@ class ChunkedReceiver(object):
 
         if self.completed:
             return 0
+        if s.__class__ is memoryview:
+            # the control line parsing below needs bytes methods
+            s = s.tobytes()
         orig_size = len(s)
 
         while s:
@@ -12,13 +12,14 @@
 #
 ##############################################################################
 
+from collections import deque
 import os
 import os.path
 import socket
-import time
 
 from waitress import trigger
 from waitress.adjustments import Adjustments
+from waitress.buffers import OverflowableBuffer
 from waitress.channel import HTTPChannel
 from waitress.task import ThreadedTaskDispatcher
 from waitress.utilities import cleanup_unix_socket
@@ -26,6 +27,7 @@ from waitress.utilities import cleanup_unix_socket
 from waitress.compat import (
     IPPROTO_IPV6,
     IPV6_V6ONLY,
+    monotonic,
 )
 from . import wasyncore
 from .proxy_headers import proxy_headers_middleware
@@ -176,6 +178,8 @@ class BaseWSGIServer(wasyncore.dispatcher, object):
 
     channel_class = HTTPChannel
     next_channel_cleanup = 0
+    buf_pool_size = 256  # maximum number of output buffers kept for reuse
+    now = 0  # monotonic time as of the current mainloop iteration
     socketmod = socket  # test shim
     asyncore = wasyncore  # test shim
 
@@ -241,6 +245,8 @@ class BaseWSGIServer(wasyncore.dispatcher, object):
         self.effective_host, self.effective_port = self.getsockname()
         self.server_name = self.get_server_name(self.effective_host)
         self.active_channels = {}
+        # released channel output buffers, kept for reuse
+        self.buf_pool = deque(maxlen=self.buf_pool_size)
         if _start:
             self.accept_connections()
 
@@ -290,8 +296,24 @@ class BaseWSGIServer(wasyncore.dispatcher, object):
     def add_task(self, task):
         self.task_dispatcher.add_task(task)
 
+    def get_buf(self):
+        """Return an empty output buffer for a channel, reusing a released
+        one if available."""
+        try:
+            return self.buf_pool.pop()
+        except IndexError:
+            return OverflowableBuffer(self.adj.outbuf_overflow)
+
+    def put_buf(self, buf):
+        """Reset an output buffer a channel no longer uses and keep it for
+        reuse."""
+        buf.reset()
+        self.buf_pool.append(buf)
+
     def readable(self):
-        now = time.time()
+        # called once per mainloop iteration, so channels read the time from
+        # here rather than looking it up on every I/O event
+        self.now = now = monotonic()
         if now >= self.next_channel_cleanup:
             self.next_channel_cleanup = now + self.adj.cleanup_interval
             self.maintenance(now)
@@ -28,14 +28,18 @@ logger = logging.getLogger("waitress")
 queue_logger = logging.getLogger("waitress.queue")
 
 
+DOUBLE_NEWLINE = re.compile(b"\r\n\r\n")
+
+
 def find_double_newline(s):
-    """Returns the position just after a double newline in the given string."""
-    pos = s.find(b"\r\n\r\n")
+    """Returns the position just after a double newline in the given string
+    or other bytes-like object, such as a memoryview."""
+    match = DOUBLE_NEWLINE.search(s)
 
-    if pos >= 0:
-        pos += 4
+    if match is None:
+        return -1
 
-    return pos
+    return match.end()
 
 
 def concat(*args):
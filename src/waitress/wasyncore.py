@@ -428,9 +428,35 @@ class dispatcher:
         else:
             return conn, addr
 
-    def send(self, data):
+    def send(self, data, flags=0):
+        try:
+            result = self.socket.send(data, flags)
+            return result
+        except socket.error as why:
+            if why.args[0] == EWOULDBLOCK:
+                return 0
+            elif why.args[0] in _DISCONNECTED:
+                self.handle_close()
+                return 0
+            else:
+                raise
+
+    def sendmsg(self, buffers, flags=0):
+        try:
+            result = self.socket.sendmsg(buffers, (), flags)
+            return result
+        except socket.error as why:
+            if why.args[0] == EWOULDBLOCK:
+                return 0
+            elif why.args[0] in _DISCONNECTED:
+                self.handle_close()
+                return 0
+            else:
+                raise
+
+    def sendfile(self, fd, offset, count):
         try:
-            result = self.socket.send(data)
+            result = os.sendfile(self.socket.fileno(), fd, offset, count)
             return result
         except socket.error as why:
             if why.args[0] == EWOULDBLOCK:
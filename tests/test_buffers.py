@@ -206,6 +206,82 @@ class TestReadOnlyFileBasedBuffer(unittest.TestCase):
         self.assertEqual(inst.file.seeked, 0)
         self.assertTrue(hasattr(inst, "close"))
 
+    def test_prepare_seekable_sendfile_fd(self):
+        import os
+        import shutil
+        import tempfile
+
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, "data")
+        with open(path, "wb") as f:
+            f.write(b"abc")
+        with open(path, "rb") as f:
+            inst = self._makeOne(f)
+            result = inst.prepare()
+            self.assertEqual(result, 3)
+            self.assertEqual(inst.sendfile_fd, f.fileno())
+
+    def test_prepare_seekable_raw_file_sendfile_fd(self):
+        import os
+        import shutil
+        import tempfile
+
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        path = os.path.join(tmpdir, "data")
+        with open(path, "wb") as f:
+            f.write(b"abc")
+        with io.FileIO(path) as f:
+            inst = self._makeOne(f)
+            result = inst.prepare()
+            self.assertEqual(result, 3)
+            self.assertEqual(inst.sendfile_fd, f.fileno())
+
+    def test_get_fileno_closed_file(self):
+        import tempfile
+
+        from waitress.buffers import _get_fileno
+
+        f = tempfile.TemporaryFile()
+        f.close()
+        self.assertEqual(_get_fileno(f), None)
+
+    def test_prepare_gzip_file(self):
+        import gzip
+        import tempfile
+
+        with tempfile.TemporaryFile() as raw:
+            gz = gzip.GzipFile(fileobj=raw, mode="wb")
+            gz.write(b"a" * 11000)
+            gz.close()
+            raw.seek(0)
+            f = gzip.GzipFile(fileobj=raw, mode="rb")
+            inst = self._makeOne(f)
+            result = inst.prepare()
+            self.assertEqual(result, 11000)
+            self.assertEqual(inst.sendfile_fd, None)
+            f.close()
+
+    def test_prepare_spooled_file_not_rolled_over(self):
+        import tempfile
+
+        with tempfile.SpooledTemporaryFile(max_size=1024) as f:
+            f.write(b"abc")
+            f.seek(0)
+            inst = self._makeOne(f)
+            result = inst.prepare()
+            self.assertEqual(result, 3)
+            self.assertEqual(inst.sendfile_fd, None)
+            self.assertFalse(f._rolled)
+
+    def test_prepare_seekable_no_fileno(self):
+        f = io.BytesIO(b"abc")
+        inst = self._makeOne(f)
+        result = inst.prepare()
+        self.assertEqual(result, 3)
+        self.assertEqual(inst.sendfile_fd, None)
+
     def test_get_numbytes_neg_one(self):
         f = io.BytesIO(b"abcdef")
         inst = self._makeOne(f)
@@ -347,10 +423,18 @@ class TestOverflowableBuffer(unittest.TestCase):
 
     def test_append_buf_None_not_longer_than_srtbuf_limit(self):
         inst = self._makeOne()
-        inst.strbuf = b"x" * 5
+        inst.strbuf = bytearray(b"x" * 5)
         inst.append(b"hello")
         self.assertEqual(inst.strbuf, b"xxxxxhello")
 
+    def test_append_buf_None_grows_strbuf_in_place(self):
+        inst = self._makeOne()
+        strbuf = inst.strbuf
+        inst.append(b"hello")
+        inst.append(b"world")
+        self.assertTrue(inst.strbuf is strbuf)
+        self.assertEqual(inst.strbuf, b"helloworld")
+
     def test_append_buf_None_longer_than_strbuf_limit(self):
         inst = self._makeOne(10000)
         inst.strbuf = b"x" * 8192
@@ -384,6 +468,14 @@ class TestOverflowableBuffer(unittest.TestCase):
         r = inst.get(5)
         self.assertEqual(r, b"xxxxx")
 
+    def test_get_buf_None_skip_False_returns_copy(self):
+        inst = self._makeOne()
+        inst.append(b"hello")
+        r = inst.get()
+        inst.append(b"world")
+        self.assertEqual(r, b"hello")
+        self.assertEqual(r.__class__, bytes)
+
     def test_get_buf_None_skip_True(self):
         inst = self._makeOne()
         inst.strbuf = b"x" * 5
@@ -488,6 +580,20 @@ class TestOverflowableBuffer(unittest.TestCase):
         self.assertTrue(buf.closed)
         self.buffers_to_close.remove(inst)
 
+    def test_reset(self):
+        inst = self._makeOne()
+        inst.append(b"x" * 9000)
+        buf = inst.buf
+        self.assertTrue(inst.overflowed)
+        inst.reset()
+        self.assertTrue(buf.file.closed)
+        self.assertEqual(inst.buf, None)
+        self.assertEqual(inst.strbuf, b"")
+        self.assertFalse(inst.overflowed)
+        self.assertEqual(len(inst), 0)
+        inst.append(b"abc")
+        self.assertEqual(inst.get(), b"abc")
+
 
 class KindaFilelike(object):
     def __init__(self, bytes, close=None, tellresults=None):
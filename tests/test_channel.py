@@ -1,3 +1,4 @@
+from collections import deque
 import unittest
 import io
 
@@ -24,6 +25,30 @@ class TestHTTPChannel(unittest.TestCase):
         self.assertEqual(inst.sendbuf_len, 2048)
         self.assertEqual(map[100], inst)
 
+    def _makeOneWithSndbuf(self, sndbuf):
+        sock = DummySock()
+        sock.getsockopt = lambda level, option: sndbuf
+        return self._makeOne(sock, "127.0.0.1", DummyAdjustments(), map={})
+
+    def test_ctor_sendbuf_len_capped(self):
+        inst = self._makeOneWithSndbuf(212992)
+        self.assertEqual(inst.sendbuf_len, 65536)
+
+    def test_ctor_sendbuf_len_page_aligned(self):
+        inst = self._makeOneWithSndbuf(10000)
+        self.assertEqual(inst.sendbuf_len, 8192)
+
+    def test_ctor_caches_adjustments(self):
+        adj = DummyAdjustments()
+        adj.send_bytes = 9000
+        adj.outbuf_high_watermark = 100
+        inst, _, map = self._makeOneWithMap(adj=adj)
+        self.assertEqual(inst.send_bytes, 9000)
+        self.assertEqual(inst.recv_bytes, adj.recv_bytes)
+        self.assertEqual(inst.outbuf_overflow, adj.outbuf_overflow)
+        self.assertEqual(inst.outbuf_high_watermark, 100)
+        self.assertEqual(inst.log_socket_errors, adj.log_socket_errors)
+
     def test_total_outbufs_len_an_outbuf_size_gt_sys_maxint(self):
         from waitress.compat import MAXINT
 
@@ -40,7 +65,7 @@ class TestHTTPChannel(unittest.TestCase):
                 return MAXINT
 
         inst.total_outbufs_len = 1
-        inst.outbufs = [DummyBuffer()]
+        inst.outbufs = deque([DummyBuffer()])
         inst.write_soon(DummyData())
         # we are testing that this method does not raise an OverflowError
         # (see https://github.com/Pylons/waitress/issues/47)
@@ -76,12 +101,12 @@ class TestHTTPChannel(unittest.TestCase):
     def test_handle_write_no_request_with_outbuf(self):
         inst, sock, map = self._makeOneWithMap()
         inst.requests = []
-        inst.outbufs = [DummyBuffer(b"abc")]
+        inst.outbufs = deque([DummyBuffer(b"abc")])
         inst.total_outbufs_len = len(inst.outbufs[0])
         inst.last_activity = 0
         result = inst.handle_write()
         self.assertEqual(result, None)
-        self.assertNotEqual(inst.last_activity, 0)
+        self.assertEqual(inst.last_activity, inst.server.now)
         self.assertEqual(sock.sent, b"abc")
 
     def test_handle_write_outbuf_raises_socketerror(self):
@@ -90,7 +115,7 @@ class TestHTTPChannel(unittest.TestCase):
         inst, sock, map = self._makeOneWithMap()
         inst.requests = []
         outbuf = DummyBuffer(b"abc", socket.error)
-        inst.outbufs = [outbuf]
+        inst.outbufs = deque([outbuf])
         inst.total_outbufs_len = len(outbuf)
         inst.last_activity = 0
         inst.logger = DummyLogger()
@@ -105,7 +130,7 @@ class TestHTTPChannel(unittest.TestCase):
         inst, sock, map = self._makeOneWithMap()
         inst.requests = []
         outbuf = DummyBuffer(b"abc", IOError)
-        inst.outbufs = [outbuf]
+        inst.outbufs = deque([outbuf])
         inst.total_outbufs_len = len(outbuf)
         inst.last_activity = 0
         inst.logger = DummyLogger()
@@ -120,7 +145,7 @@ class TestHTTPChannel(unittest.TestCase):
         inst, sock, map = self._makeOneWithMap()
         inst.requests = []
         outbuf = DummyBuffer(b"")
-        inst.outbufs = [outbuf]
+        inst.outbufs = deque([outbuf])
         inst.will_close = True
         inst.last_activity = 0
         result = inst.handle_write()
@@ -133,9 +158,9 @@ class TestHTTPChannel(unittest.TestCase):
     def test_handle_write_no_requests_outbuf_gt_send_bytes(self):
         inst, sock, map = self._makeOneWithMap()
         inst.requests = [True]
-        inst.outbufs = [DummyBuffer(b"abc")]
+        inst.outbufs = deque([DummyBuffer(b"abc")])
         inst.total_outbufs_len = len(inst.outbufs[0])
-        inst.adj.send_bytes = 2
+        inst.send_bytes = 2
         inst.will_close = False
         inst.last_activity = 0
         result = inst.handle_write()
@@ -147,7 +172,7 @@ class TestHTTPChannel(unittest.TestCase):
     def test_handle_write_close_when_flushed(self):
         inst, sock, map = self._makeOneWithMap()
         outbuf = DummyBuffer(b"abc")
-        inst.outbufs = [outbuf]
+        inst.outbufs = deque([outbuf])
         inst.total_outbufs_len = len(outbuf)
         inst.will_close = False
         inst.close_when_flushed = True
@@ -185,7 +210,7 @@ class TestHTTPChannel(unittest.TestCase):
         inst.received = lambda x: L.append(x)
         result = inst.handle_read()
         self.assertEqual(result, None)
-        self.assertNotEqual(inst.last_activity, 0)
+        self.assertEqual(inst.last_activity, inst.server.now)
         self.assertEqual(L, [b"abc"])
 
     def test_handle_read_error(self):
@@ -217,6 +242,36 @@ class TestHTTPChannel(unittest.TestCase):
         self.assertEqual(wrote, 1)
         self.assertEqual(len(inst.outbufs[0]), 1)
 
+    def test_write_soon_pulls_trigger_after_releasing_lock(self):
+        inst, sock, map = self._makeOneWithMap()
+        inst.send_bytes = 1
+
+        class Server(DummyServer):
+            def pull_trigger(self):
+                self.lock_held = inst.outbuf_lock.held
+
+        class Lock(DummyLock):
+            held = False
+
+            def __enter__(self):
+                self.held = True
+
+            def __exit__(self, type, val, traceback):
+                self.held = False
+
+        inst.server = Server()
+        inst.outbuf_lock = Lock()
+        wrote = inst.write_soon(b"a")
+        self.assertEqual(wrote, 1)
+        self.assertFalse(inst.server.lock_held)
+
+    def test_write_soon_below_send_bytes_does_not_pull_trigger(self):
+        inst, sock, map = self._makeOneWithMap()
+        inst.send_bytes = 10
+        wrote = inst.write_soon(b"a")
+        self.assertEqual(wrote, 1)
+        self.assertFalse(inst.server.trigger_pulled)
+
     def test_write_soon_filewrapper(self):
         from waitress.buffers import ReadOnlyFileBasedBuffer
 
@@ -253,7 +308,7 @@ class TestHTTPChannel(unittest.TestCase):
 
     def test_write_soon_rotates_outbuf_on_overflow(self):
         inst, sock, map = self._makeOneWithMap()
-        inst.adj.outbuf_high_watermark = 3
+        inst.outbuf_high_watermark = 3
         inst.current_outbuf_count = 4
         wrote = inst.write_soon(b"xyz")
         self.assertEqual(wrote, 3)
@@ -263,7 +318,7 @@ class TestHTTPChannel(unittest.TestCase):
 
     def test_write_soon_waits_on_backpressure(self):
         inst, sock, map = self._makeOneWithMap()
-        inst.adj.outbuf_high_watermark = 3
+        inst.outbuf_high_watermark = 3
         inst.total_outbufs_len = 4
         inst.current_outbuf_count = 4
 
@@ -280,13 +335,27 @@ class TestHTTPChannel(unittest.TestCase):
         self.assertEqual(inst.outbufs[1].get(), b"xyz")
         self.assertTrue(inst.outbuf_lock.waited)
 
+    def test_write_soon_backpressure_drained_while_spinning(self):
+        inst, sock, map = self._makeOneWithMap()
+        inst.outbuf_high_watermark = 3
+        inst.total_outbufs_len = 4
+
+        class Server(DummyServer):
+            def pull_trigger(self):
+                inst.total_outbufs_len = 0
+
+        inst.server = Server()
+        wrote = inst.write_soon(b"xyz")
+        self.assertEqual(wrote, 3)
+        self.assertFalse(hasattr(inst.outbuf_lock, "waited"))
+
     def test_handle_write_notify_after_flush(self):
         inst, sock, map = self._makeOneWithMap()
         inst.requests = [True]
-        inst.outbufs = [DummyBuffer(b"abc")]
+        inst.outbufs = deque([DummyBuffer(b"abc")])
         inst.total_outbufs_len = len(inst.outbufs[0])
-        inst.adj.send_bytes = 1
-        inst.adj.outbuf_high_watermark = 5
+        inst.send_bytes = 1
+        inst.outbuf_high_watermark = 5
         inst.will_close = False
         inst.last_activity = 0
         result = inst.handle_write()
@@ -299,11 +368,11 @@ class TestHTTPChannel(unittest.TestCase):
     def test_handle_write_no_notify_after_flush(self):
         inst, sock, map = self._makeOneWithMap()
         inst.requests = [True]
-        inst.outbufs = [DummyBuffer(b"abc")]
+        inst.outbufs = deque([DummyBuffer(b"abc")])
         inst.total_outbufs_len = len(inst.outbufs[0])
-        inst.adj.send_bytes = 1
-        inst.adj.outbuf_high_watermark = 2
-        sock.send = lambda x: False
+        inst.send_bytes = 1
+        inst.outbuf_high_watermark = 2
+        sock.send = lambda x, flags=0: False
         inst.will_close = False
         inst.last_activity = 0
         result = inst.handle_write()
@@ -327,7 +396,7 @@ class TestHTTPChannel(unittest.TestCase):
 
     def test__flush_some_full_outbuf_socket_returns_zero(self):
         inst, sock, map = self._makeOneWithMap()
-        sock.send = lambda x: False
+        sock.send = lambda x, flags=0: False
         inst.outbufs[0].append(b"abc")
         inst.total_outbufs_len = sum(len(x) for x in inst.outbufs)
         result = inst._flush_some()
@@ -335,18 +404,220 @@ class TestHTTPChannel(unittest.TestCase):
 
     def test_flush_some_multiple_buffers_first_empty(self):
         inst, sock, map = self._makeOneWithMap()
-        sock.send = lambda x: len(x)
+        sock.send = lambda x, flags=0: len(x)
         buffer = DummyBuffer(b"abc")
         inst.outbufs.append(buffer)
         inst.total_outbufs_len = sum(len(x) for x in inst.outbufs)
         result = inst._flush_some()
         self.assertEqual(result, True)
         self.assertEqual(buffer.skipped, 3)
-        self.assertEqual(inst.outbufs, [buffer])
+        self.assertEqual(list(inst.outbufs), [buffer])
+
+    def test_flush_some_multiple_buffers_all_drained(self):
+        inst, sock, map = self._makeOneWithMap()
+        buffers = [DummyBuffer(b"abc"), DummyBuffer(b"def"), DummyBuffer(b"ghi")]
+        inst.outbufs.extend(buffers)
+        inst.total_outbufs_len = sum(len(x) for x in inst.outbufs)
+        result = inst._flush_some()
+        self.assertEqual(result, True)
+        self.assertEqual(sock.sent, b"abcdefghi")
+        self.assertEqual(sock.send_calls, 1)
+        self.assertEqual(inst.total_outbufs_len, 0)
+        self.assertEqual(list(inst.outbufs), [buffers[-1]])
+        self.assertTrue(buffers[0].closed)
+        self.assertTrue(buffers[1].closed)
+        self.assertEqual(len(inst.server.released_bufs), 1)
+
+    def test__flush_some_vectored(self):
+        inst, sock, map = self._makeOneWithMap()
+        sock.sendmsg = sock.send_vectored
+        inst.vectored_send = True
+        buffers = [DummyBuffer(b"abc"), DummyBuffer(b"def")]
+        inst.outbufs.extend(buffers)
+        inst.total_outbufs_len = sum(len(x) for x in inst.outbufs)
+        result = inst._flush_some()
+        self.assertEqual(result, True)
+        self.assertEqual(sock.sent, b"abcdef")
+        self.assertEqual(sock.sendmsg_calls, 1)
+        self.assertEqual(inst.total_outbufs_len, 0)
+        self.assertEqual(buffers[0].skipped, 3)
+        self.assertEqual(buffers[1].skipped, 3)
+
+    def test__flush_some_gathered_single_chunk(self):
+        inst, sock, map = self._makeOneWithMap()
+        sock.sendmsg = sock.send_vectored
+        inst.vectored_send = True
+        inst.sendbuf_len = 3
+        buffers = [DummyBuffer(b"abc"), DummyBuffer(b"def")]
+        inst.outbufs.extend(buffers)
+        inst.total_outbufs_len = sum(len(x) for x in inst.outbufs)
+        result = inst._flush_some()
+        self.assertEqual(result, True)
+        self.assertEqual(sock.sent, b"abcdef")
+        self.assertEqual(sock.sendmsg_calls, 0)
+        self.assertEqual(sock.send_calls, 2)
+
+    def test__flush_some_vectored_limited_by_sendbuf_len(self):
+        from waitress.buffers import OverflowableBuffer
+
+        inst, sock, map = self._makeOneWithMap()
+        sock.sendmsg = sock.send_vectored
+        inst.vectored_send = True
+        inst.sendbuf_len = 4
+        for data in (b"abc", b"def", b"ghi"):
+            buf = OverflowableBuffer(1000)
+            buf.append(data)
+            inst.outbufs.append(buf)
+        inst.total_outbufs_len = 9
+        result = inst._flush_some()
+        self.assertEqual(result, True)
+        self.assertEqual(sock.sent, b"abcdefghi")
+        self.assertEqual(sock.sendmsg_calls, 2)
+        self.assertEqual(sock.send_calls, 1)
+        self.assertEqual(inst.total_outbufs_len, 0)
+
+    def test__flush_some_msg_more_until_last_send(self):
+        from waitress.buffers import OverflowableBuffer
+        from waitress.channel import MSG_MORE
+
+        inst, sock, map = self._makeOneWithMap()
+        sock.sendmsg = sock.send_vectored
+        inst.vectored_send = True
+        inst.sendbuf_len = 4
+        for data in (b"abc", b"def", b"ghi"):
+            buf = OverflowableBuffer(1000)
+            buf.append(data)
+            inst.outbufs.append(buf)
+        inst.total_outbufs_len = 9
+        inst._flush_some()
+        self.assertEqual(sock.sent, b"abcdefghi")
+        self.assertEqual(sock.send_flags, [MSG_MORE, MSG_MORE, 0])
+
+    def test__flush_some_vectored_partial_send(self):
+        from waitress.buffers import OverflowableBuffer
+
+        inst, sock, map = self._makeOneWithMap()
+        sock.sendmsg = lambda buffers, *args: 4
+        sock.send = lambda data, flags=0: 0
+        inst.vectored_send = True
+        first = OverflowableBuffer(1000)
+        first.append(b"abc")
+        second = OverflowableBuffer(1000)
+        second.append(b"def")
+        inst.outbufs.extend([first, second])
+        inst.total_outbufs_len = 6
+        result = inst._flush_some()
+        self.assertEqual(result, True)
+        self.assertEqual(inst.total_outbufs_len, 2)
+        self.assertEqual(list(inst.outbufs), [second])
+        self.assertEqual(second.get(), b"ef")
+
+    def test__flush_some_vectored_short_send(self):
+        from waitress.buffers import OverflowableBuffer
+
+        inst, sock, map = self._makeOneWithMap()
+        sock.send = lambda data, flags=0: 0
+        inst.vectored_send = True
+        buffers = []
+        for data in (b"ab", b"cd", b"ef"):
+            buf = OverflowableBuffer(1000)
+            buf.append(data)
+            buffers.append(buf)
+        inst.outbufs.extend(buffers)
+        inst.total_outbufs_len = 6
+        sock.sendmsg = lambda buffers, *args: 2 if len(buffers) == 3 else 0
+        result = inst._flush_some()
+        self.assertEqual(result, True)
+        self.assertEqual(inst.total_outbufs_len, 4)
+        self.assertEqual(list(inst.outbufs), buffers[1:])
+        self.assertEqual(buffers[1].get(), b"cd")
+        self.assertEqual(buffers[2].get(), b"ef")
+
+    def _makeFileWrapper(self, data):
+        import tempfile
+
+        from waitress.buffers import ReadOnlyFileBasedBuffer
+
+        f = tempfile.TemporaryFile()
+        self.addCleanup(f.close)
+        f.write(data)
+        f.seek(0)
+        wrapper = ReadOnlyFileBasedBuffer(f)
+        wrapper.prepare()
+        return wrapper
+
+    def test__flush_some_sendfile(self):
+        inst, sock, map = self._makeOneWithMap()
+        inst.use_sendfile = True
+        calls = []
+
+        def sendfile(fd, offset, count):
+            calls.append((fd, offset, count))
+            return 2 if not offset else 0
+
+        inst.sendfile = sendfile
+        wrapper = self._makeFileWrapper(b"abcdef")
+        inst.outbufs.appendleft(wrapper)
+        inst.total_outbufs_len = 6
+        result = inst._flush_some()
+        self.assertEqual(result, True)
+        fd = wrapper.sendfile_fd
+        self.assertEqual(calls, [(fd, 0, 6), (fd, 2, 4)])
+        self.assertEqual(inst.total_outbufs_len, 4)
+        self.assertEqual(wrapper.remain, 4)
+        self.assertEqual(wrapper.file.tell(), 2)
+
+    def test__flush_some_sendfile_unsupported(self):
+        import errno
+
+        inst, sock, map = self._makeOneWithMap()
+        inst.use_sendfile = True
+
+        def sendfile(fd, offset, count):
+            raise OSError(errno.EINVAL, "Invalid argument")
+
+        inst.sendfile = sendfile
+        wrapper = self._makeFileWrapper(b"abcdef")
+        inst.outbufs.appendleft(wrapper)
+        inst.total_outbufs_len = 6
+        result = inst._flush_some()
+        self.assertEqual(result, True)
+        self.assertEqual(wrapper.sendfile_fd, None)
+        self.assertEqual(sock.sent, b"abcdef")
+        self.assertEqual(inst.total_outbufs_len, 0)
+
+    def test__flush_some_sendfile_raises(self):
+        import errno
+
+        inst, sock, map = self._makeOneWithMap()
+        inst.use_sendfile = True
+
+        def sendfile(fd, offset, count):
+            raise OSError(errno.EIO, "I/O error")
+
+        inst.sendfile = sendfile
+        wrapper = self._makeFileWrapper(b"abcdef")
+        inst.outbufs.appendleft(wrapper)
+        inst.total_outbufs_len = 6
+        self.assertRaises(OSError, inst._flush_some)
+
+    def test__flush_some_gather_stops_at_sendfile(self):
+        inst, sock, map = self._makeOneWithMap()
+        inst.use_sendfile = True
+        inst.sendfile = lambda fd, offset, count: 0
+        inst.outbufs[0].append(b"headers")
+        wrapper = self._makeFileWrapper(b"abcdef")
+        inst.outbufs.append(wrapper)
+        inst.total_outbufs_len = 13
+        result = inst._flush_some()
+        self.assertEqual(result, True)
+        self.assertEqual(sock.sent, b"headers")
+        self.assertEqual(inst.total_outbufs_len, 6)
+        self.assertEqual(list(inst.outbufs), [wrapper])
 
     def test_flush_some_multiple_buffers_close_raises(self):
         inst, sock, map = self._makeOneWithMap()
-        sock.send = lambda x: len(x)
+        sock.send = lambda x, flags=0: len(x)
         buffer = DummyBuffer(b"abc")
         inst.outbufs.append(buffer)
         inst.total_outbufs_len = sum(len(x) for x in inst.outbufs)
@@ -359,7 +630,7 @@ class TestHTTPChannel(unittest.TestCase):
         result = inst._flush_some()
         self.assertEqual(result, True)
         self.assertEqual(buffer.skipped, 3)
-        self.assertEqual(inst.outbufs, [buffer])
+        self.assertEqual(list(inst.outbufs), [buffer])
         self.assertEqual(len(inst.logger.exceptions), 1)
 
     def test__flush_some_outbuf_len_gt_sys_maxint(self):
@@ -379,7 +650,7 @@ class TestHTTPChannel(unittest.TestCase):
                 return b"123"
 
         buf = DummyHugeOutbuffer()
-        inst.outbufs = [buf]
+        inst.outbufs = deque([buf])
         inst.send = lambda *arg: 0
         result = inst._flush_some()
         # we are testing that _flush_some doesn't raise an OverflowError
@@ -392,6 +663,53 @@ class TestHTTPChannel(unittest.TestCase):
         self.assertEqual(inst.connected, False)
         self.assertEqual(sock.closed, True)
 
+    def test_handle_close_while_flushing_with_lock(self):
+        import errno
+        import socket
+
+        sock = DummySock()
+
+        def send(data, flags=0):
+            raise socket.error(errno.ECONNRESET)
+
+        sock.send = send
+        inst = self._makeOne(sock, "127.0.0.1", DummyAdjustments(), map={})
+        inst.outbufs[0].append(b"abc")
+        inst.total_outbufs_len = 3
+        inst._flush_some_if_lockable()
+        self.assertEqual(inst.connected, False)
+        self.assertEqual(inst.outbuf_lock_held, False)
+        self.assertTrue(sock.closed)
+        # the lock was released and is usable again
+        self.assertTrue(inst.outbuf_lock.acquire(False))
+        inst.outbuf_lock.release()
+
+    def test_handle_close_releases_outbufs(self):
+        inst, sock, map = self._makeOneWithMap()
+        outbuf = inst.outbufs[0]
+        wrapper = DummyBuffer(b"abc")
+        inst.outbufs.append(wrapper)
+        inst.handle_close()
+        self.assertEqual(inst.server.released_bufs, [outbuf])
+        self.assertTrue(wrapper.closed)
+        self.assertEqual(len(inst.outbufs), 0)
+
+    def test_handle_close_closes_outbufs_without_lock(self):
+        inst, sock, map = self._makeOneWithMap()
+        wrapper = DummyBuffer(b"abc")
+        locked = []
+
+        def close():
+            locked.append(inst.outbuf_lock.acquire(False))
+            inst.outbuf_lock.release()
+
+        wrapper.close = close
+        inst.outbufs.append(wrapper)
+        inst.handle_close()
+        # outbuf_lock was free while the buffer was closed
+        self.assertEqual(locked, [True])
+        self.assertEqual(inst.connected, False)
+
     def test_handle_close_outbuf_raises_on_close(self):
         inst, sock, map = self._makeOneWithMap()
 
@@ -427,6 +745,19 @@ class TestHTTPChannel(unittest.TestCase):
         self.assertEqual(inst.server.tasks, [inst])
         self.assertTrue(inst.requests)
 
+    def test_received_pipelined(self):
+        from waitress.adjustments import Adjustments
+
+        inst, sock, map = self._makeOneWithMap(adj=Adjustments())
+        inst.server = DummyServer()
+        inst.received(
+            b"POST /a HTTP/1.1\r\nContent-Length: 3\r\n\r\nabc"
+            b"GET /b HTTP/1.1\r\n\r\n"
+        )
+        self.assertEqual(inst.server.tasks, [inst])
+        self.assertEqual([r.path for r in inst.requests], ["/a", "/b"])
+        self.assertEqual(inst.requests[0].get_body_stream().read(), b"abc")
+
     def test_received_no_chunk(self):
         inst, sock, map = self._makeOneWithMap()
         self.assertEqual(inst.received(b""), False)
@@ -453,6 +784,17 @@ class TestHTTPChannel(unittest.TestCase):
         self.assertEqual(inst.request, None)
         self.assertEqual(inst.server.tasks, [])
 
+    def test_received_preq_completed_single_read(self):
+        inst, sock, map = self._makeOneWithMap()
+        inst.server = DummyServer()
+        preq = DummyParser()
+        inst.request = preq
+        inst.received(b"GET / HTTP/1.1\r\n\r\n")
+        self.assertEqual(inst.request, None)
+        self.assertEqual(inst.requests, [preq])
+        self.assertEqual(inst.server.tasks, [inst])
+        self.assertEqual(preq.data, b"GET / HTTP/1.1\r\n\r\n")
+
     def test_received_preq_error(self):
         inst, sock, map = self._makeOneWithMap()
         inst.server = DummyServer()
@@ -711,6 +1053,7 @@ class DummySock(object):
 
     def __init__(self):
         self.sent = b""
+        self.send_flags = []
 
     def setblocking(self, *arg):
         self.blocking = True
@@ -727,7 +1070,19 @@ class DummySock(object):
     def close(self):
         self.closed = True
 
-    def send(self, data):
+    send_calls = 0
+    sendmsg_calls = 0
+
+    def send(self, data, flags=0):
+        self.send_flags.append(flags)
+        self.send_calls += 1
+        self.sent += data
+        return len(data)
+
+    def send_vectored(self, buffers, ancdata=(), flags=0):
+        self.send_flags.append(flags)
+        self.sendmsg_calls += 1
+        data = b"".join(buffers)
         self.sent += data
         return len(data)
 
@@ -800,11 +1155,13 @@ class DummyAdjustments(object):
 
 class DummyServer(object):
     trigger_pulled = False
+    now = 1000
     adj = DummyAdjustments()
 
     def __init__(self):
         self.tasks = []
         self.active_channels = {}
+        self.released_bufs = []
 
     def add_task(self, task):
         self.tasks.append(task)
@@ -812,6 +1169,15 @@ class DummyServer(object):
     def pull_trigger(self):
         self.trigger_pulled = True
 
+    def get_buf(self):
+        from waitress.buffers import OverflowableBuffer
+
+        return OverflowableBuffer(self.adj.outbuf_overflow)
+
+    def put_buf(self, buf):
+        buf.reset()
+        self.released_bufs.append(buf)
+
 
 class DummyParser(object):
     version = 1
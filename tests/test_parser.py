@@ -83,6 +83,25 @@ class TestHTTPRequestParser(unittest.TestCase):
         self.assertFalse(self.parser.completed)
         self.assertEqual(self.parser.headers, {})
 
+    def test_received_memoryview_pipelined(self):
+        data = b"GET /foobar HTTP/1.1\r\n\r\nGET /next HTTP/1.1\r\n\r\n"
+        result = self.parser.received(memoryview(data))
+        self.assertEqual(result, 24)
+        self.assertTrue(self.parser.completed)
+        self.assertEqual(self.parser.path, "/foobar")
+
+    def test_received_memoryview_headers_split(self):
+        data = b"GET /foobar HTTP/1.1\r\nX-Foo: bar\r\n\r\n"
+        view = memoryview(data)
+        result = self.parser.received(view[:22])
+        self.assertEqual(result, 22)
+        self.assertFalse(self.parser.completed)
+        self.assertEqual(self.parser.header_plus, data[:22])
+        result = self.parser.received(view[22:])
+        self.assertEqual(result, 14)
+        self.assertTrue(self.parser.completed)
+        self.assertEqual(self.parser.headers["X_FOO"], "bar")
+
     def test_received_already_completed(self):
         self.parser.completed = True
         result = self.parser.received(b"a")
@@ -72,6 +72,14 @@ class TestChunkedReceiver(unittest.TestCase):
         self.assertEqual(result, 1)
         self.assertEqual(inst.completed, False)
 
+    def test_received_memoryview(self):
+        buf = DummyBuffer()
+        inst = self._makeOne(buf)
+        data = b"1\r\na\r\n0\r\n\r\n"
+        result = inst.received(memoryview(data))
+        self.assertEqual(result, len(data))
+        self.assertEqual(inst.completed, True)
+
     def test_received_control_line_notfinished(self):
         buf = DummyBuffer()
         inst = self._makeOne(buf)
@@ -194,10 +194,10 @@ class TestWSGIServer(unittest.TestCase):
         self.assertTrue(inst.readable())
 
     def test_readable_maintenance_false(self):
-        import time
+        from waitress.compat import monotonic
 
         inst = self._makeOneWithMap()
-        then = time.time() + 1000
+        then = monotonic() + 1000
         inst.next_channel_cleanup = then
         L = []
         inst.maintenance = lambda t: L.append(t)
@@ -213,6 +213,7 @@ class TestWSGIServer(unittest.TestCase):
         inst.readable()
         self.assertEqual(len(L), 1)
         self.assertNotEqual(inst.next_channel_cleanup, 0)
+        self.assertEqual(L, [inst.now])
 
     def test_writable(self):
         inst = self._makeOneWithMap()
@@ -273,6 +274,32 @@ class TestWSGIServer(unittest.TestCase):
         inst.maintenance(10000)
         self.assertEqual(zombie.will_close, True)
 
+    def test_get_buf_empty_pool(self):
+        from waitress.buffers import OverflowableBuffer
+
+        inst = self._makeOneWithMap()
+        buf = inst.get_buf()
+        self.assertEqual(buf.__class__, OverflowableBuffer)
+        self.assertEqual(buf.overflow, inst.adj.outbuf_overflow)
+
+    def test_put_buf_then_get_buf_reuses(self):
+        inst = self._makeOneWithMap()
+        buf = inst.get_buf()
+        buf.append(b"abc")
+        inst.put_buf(buf)
+        self.assertEqual(len(buf), 0)
+        self.assertTrue(inst.get_buf() is buf)
+        self.assertFalse(inst.get_buf() is buf)
+
+    def test_put_buf_pool_full(self):
+        inst = self._makeOneWithMap()
+        inst.buf_pool = inst.buf_pool.__class__(maxlen=1)
+        first = inst.get_buf()
+        second = inst.get_buf()
+        inst.put_buf(first)
+        inst.put_buf(second)
+        self.assertEqual(list(inst.buf_pool), [second])
+
     def test_backward_compatibility(self):
         from waitress.server import WSGIServer, TcpWSGIServer
         from waitress.adjustments import Adjustments
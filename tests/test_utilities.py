@@ -94,6 +94,9 @@ class Test_find_double_newline(unittest.TestCase):
     def test_mixed(self):
         self.assertEqual(self._callFUT(b"\n\n00\r\n\r\n"), 8)
 
+    def test_memoryview(self):
+        self.assertEqual(self._callFUT(memoryview(b"\n\n00\r\n\r\nabc")), 8)
+
 
 class TestBadRequest(unittest.TestCase):
     def _makeOne(self):
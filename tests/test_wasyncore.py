@@ -1515,6 +1515,106 @@ class Test_dispatcher(unittest.TestCase):
         inst = self._makeOne(sock=sock, map=map)
         self.assertRaises(socket.error, inst.send, "a")
 
+    def test_sendmsg(self):
+        sock = dummysocket()
+        map = {}
+        sock.sendmsg = lambda buffers, ancdata, flags: sum(len(x) for x in buffers)
+        inst = self._makeOne(sock=sock, map=map)
+        result = inst.sendmsg([b"ab", b"c"])
+        self.assertEqual(result, 3)
+
+    def test_sendmsg_raise_EWOULDBLOCK(self):
+        sock = dummysocket()
+        map = {}
+
+        def sendmsg(*arg, **kw):
+            raise socket.error(errno.EWOULDBLOCK)
+
+        sock.sendmsg = sendmsg
+        inst = self._makeOne(sock=sock, map=map)
+        result = inst.sendmsg([b"a"])
+        self.assertEqual(result, 0)
+
+    def test_sendmsg_raises_disconnect(self):
+        sock = dummysocket()
+        map = {}
+
+        def sendmsg(*arg, **kw):
+            raise socket.error(errno.ECONNRESET)
+
+        def handle_close():
+            inst.close_handled = True
+
+        sock.sendmsg = sendmsg
+        inst = self._makeOne(sock=sock, map=map)
+        inst.handle_close = handle_close
+        result = inst.sendmsg([b"a"])
+        self.assertEqual(result, 0)
+        self.assertTrue(inst.close_handled)
+
+    def test_sendmsg_raise_unexpected_socketerror(self):
+        sock = dummysocket()
+        map = {}
+
+        def sendmsg(*arg, **kw):
+            raise socket.error(122)
+
+        sock.sendmsg = sendmsg
+        inst = self._makeOne(sock=sock, map=map)
+        self.assertRaises(socket.error, inst.sendmsg, [b"a"])
+
+    def _callSendfile(self, sendfile, handle_close=None):
+        from waitress import wasyncore
+
+        class DummyOS(object):
+            pass
+
+        dummy_os = DummyOS()
+        dummy_os.sendfile = sendfile
+        sock = dummysocket()
+        inst = self._makeOne(sock=sock, map={})
+        if handle_close is not None:
+            inst.handle_close = handle_close
+        old_os = wasyncore.os
+        wasyncore.os = dummy_os
+        try:
+            return inst.sendfile(7, 3, 10)
+        finally:
+            wasyncore.os = old_os
+
+    def test_sendfile(self):
+        calls = []
+
+        def sendfile(*args):
+            calls.append(args)
+            return 10
+
+        result = self._callSendfile(sendfile)
+        self.assertEqual(result, 10)
+        self.assertEqual(calls, [(42, 7, 3, 10)])
+
+    def test_sendfile_raise_EWOULDBLOCK(self):
+        def sendfile(*args):
+            raise socket.error(errno.EWOULDBLOCK)
+
+        self.assertEqual(self._callSendfile(sendfile), 0)
+
+    def test_sendfile_raises_disconnect(self):
+        closed = []
+
+        def sendfile(*args):
+            raise socket.error(errno.EPIPE)
+
+        result = self._callSendfile(sendfile, lambda: closed.append(True))
+        self.assertEqual(result, 0)
+        self.assertEqual(closed, [True])
+
+    def test_sendfile_raise_unexpected_socketerror(self):
+        def sendfile(*args):
+            raise socket.error(errno.EINVAL)
+
+        self.assertRaises(socket.error, self._callSendfile, sendfile)
+
     def test_recv_raises_disconnect(self):
         sock = dummysocket()
         map = {}